@@ -2,9 +2,7 @@ import streamlit as st
 import numpy as np
 import joblib
 import os
-import shap
-import matplotlib.pyplot as plt
-import pandas as pd
+import streamlit.components.v1 as components
 
 # ========== 页面配置 ==========
 st.set_page_config(
@@ -14,7 +12,7 @@ st.set_page_config(
 )
 
 # ========== 自定义 CSS ==========
-st.markdown("""
+CSS_BLOCK = """
 <style>
 .stApp {
     background: linear-gradient(135deg, #e6f0ff, #ffffff);
@@ -30,7 +28,7 @@ p, label {
     font-family: 'Times New Roman', serif;
     font-size: 16px;
 }
-div.stButton > button {
+div.stButton > button, div.stFormSubmitButton > button {
     width: 100%;
     background: linear-gradient(90deg, #007bff, #0056b3);
     color: white;
@@ -42,7 +40,7 @@ div.stButton > button {
     transition: all 0.3s ease;
     font-family: 'Times New Roman', serif;
 }
-div.stButton > button:hover {
+div.stButton > button:hover, div.stFormSubmitButton > button:hover {
     background: linear-gradient(90deg, #0056b3, #003d80);
     transform: scale(1.03);
 }
@@ -61,92 +59,153 @@ div.stButton > button:hover {
     color: #003366;
 }
 </style>
-""", unsafe_allow_html=True)
-
-# ========== 页面标题 ==========
-st.markdown("<h1>💧 Pervious Concrete Compressive Strength Prediction</h1>", unsafe_allow_html=True)
-st.markdown("<p style='text-align:center;'>Enter the following 8 parameters to predict the compressive strength (MPa).</p>", unsafe_allow_html=True)
-
-# ========== 模型和标准化器路径 ==========
-MODEL_PATH = "final_catboost_model.pkl"
-SCALER_PATH = "scaler.pkl"
+"""
+st.markdown(CSS_BLOCK, unsafe_allow_html=True)
+
+# ========== 任务配置 ==========
+# 每个任务对应一组模型/标准化器文件和输入特征；features 的顺序即模型的输入顺序，
+# 控件按奇偶位置交替放在左右两列。
+CONFIG = {
+    "Strength": {
+        "title": "💧 Pervious Concrete Compressive Strength Prediction",
+        "target": "Compressive Strength",
+        "unit": "MPa",
+        "backend": "CatBoost",
+        "model_path": "final_catboost_model.pkl",
+        "scaler_path": "scaler.pkl",
+        "features": [
+            {"name": "W/C", "label": "W/C (Water–Cement Ratio)", "value": 0.3, "step": 0.01},
+            {"name": "A/C", "label": "A/C (Aggregate–Cement Ratio)", "value": 3.0, "step": 0.1},
+            {"name": "Dmin", "label": "Dmin (Minimum Aggregate Size)", "value": 4.75, "step": 0.01},
+            {"name": "ASR", "label": "ASR (Aggregate Size Ratio)", "value": 0.5, "step": 0.01},
+            {"name": "Porosity", "label": "Porosity", "value": 15.0, "step": 0.1},
+            {"name": "Shape", "label": "Specimen Shape", "options": {"Cylinder": 1, "Cube": 2}},
+            {"name": "Diameter", "label": "Size (Cylinder diameter / Cube side)", "value": 100.0, "step": 1.0},
+            {"name": "Height", "label": "Specimen Height", "value": 200.0, "step": 1.0},
+        ],
+    },
+}
 
-if not os.path.exists(MODEL_PATH) or not os.path.exists(SCALER_PATH):
-    st.error("⚠️ Model or scaler file is missing. Please check the file paths.")
-else:
-    @st.cache_resource
-    def load_model_and_scaler():
-        model = joblib.load(MODEL_PATH)
-        scaler = joblib.load(SCALER_PATH)
-        return model, scaler
 
-    model, scaler = load_model_and_scaler()
+@st.cache_resource
+def paths_ok(model_path, scaler_path):
+    return os.path.exists(model_path) and os.path.exists(scaler_path)
+
+
+@st.cache_resource
+def load_model_and_scaler(model_path, scaler_path):
+    model = joblib.load(model_path)
+    # 单行预测：线程池开销远大于推理本身，固定为单线程（CatBoost 在调用处传 thread_count）
+    if hasattr(model, "get_booster"):
+        model.get_booster().set_param({"nthread": 1})
+    scaler = joblib.load(scaler_path)
+    mean = scaler.mean_.astype(np.float64)
+    inv_scale = (1.0 / scaler.scale_).astype(np.float64)
+    return model, mean, inv_scale
+
+
+@st.cache_resource
+def get_shap_js():
+    import shap
+    return shap.getjs()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def compute_shap_and_plot(task, x_tuple):
+    import shap
+
+    cfg = CONFIG[task]
+    model, mean, inv_scale = load_model_and_scaler(cfg["model_path"], cfg["scaler_path"])
+    x = np.asarray(x_tuple, dtype=np.float64).reshape(1, -1)
+    input_scaled = (x - mean) * inv_scale
+
+    # 预测与 SHAP 解释：一次树遍历同时得到各特征贡献和基准值（单行输入，单线程）
+    if hasattr(model, "get_booster"):
+        import xgboost as xgb
+        booster = model.get_booster()
+        dmat = xgb.DMatrix(input_scaled, feature_names=booster.feature_names, nthread=1)
+        contribs = booster.predict(dmat, pred_contribs=True)
+    else:
+        from catboost import Pool
+        pool = Pool(input_scaled, thread_count=1)
+        contribs = model.get_feature_importance(pool, type="ShapValues", thread_count=1)
+    sv = contribs[0, :-1]
+    base = float(contribs[0, -1])
+    prediction = float(sv.sum() + base)
+
+    force_plot = shap.plots.force(
+        base,
+        sv,
+        feature_names=[f["name"] for f in cfg["features"]],
+        matplotlib=False
+    )
+    return prediction, force_plot.html()
+
+
+def render(task):
+    cfg = CONFIG[task]
+
+    # ========== 页面标题 ==========
+    header_html = (
+        f"<h1>{cfg['title']}</h1>"
+        f"<p style='text-align:center;'>Enter the following {len(cfg['features'])} parameters "
+        f"to predict the {cfg['target'].lower()} ({cfg['unit']}).</p>"
+    )
+    st.markdown(header_html, unsafe_allow_html=True)
+
+    if not paths_ok(cfg["model_path"], cfg["scaler_path"]):
+        # 只缓存成功的检查结果，文件补齐后下次运行即可恢复
+        paths_ok.clear()
+        st.error("⚠️ Model or scaler file is missing. Please check the file paths.")
+        return
 
     # ========== 输入参数布局 ==========
-    col1, col2 = st.columns(2)
-    with col1:
-        W_C = st.number_input("W/C (Water–Cement Ratio)", min_value=0.0, value=0.3, step=0.01)
-        Dmin = st.number_input("Dmin (Minimum Aggregate Size)", min_value=0.0, value=4.75, step=0.01)
-        Porosity = st.number_input("Porosity", min_value=0.0, value=15.0, step=0.1)
-        Diameter = st.number_input("Size (Cylinder diameter / Cube side)", min_value=0.0, value=100.0, step=1.0)
-    with col2:
-        A_C = st.number_input("A/C (Aggregate–Cement Ratio)", min_value=0.0, value=3.0, step=0.1)
-        ASR = st.number_input("ASR (Aggregate Size Ratio)", min_value=0.0, value=0.5, step=0.01)
-        shape_option = st.selectbox("Specimen Shape", ["Cylinder", "Cube"])
-        Shape = 1 if shape_option == "Cylinder" else 2
-        Height = st.number_input("Specimen Height", min_value=0.0, value=200.0, step=1.0)
-
-    # ========== 预测按钮 ==========
-    st.markdown("<div style='text-align:center;'>", unsafe_allow_html=True)
-    predict_button = st.button("🔮 Predict Compressive Strength")
-    st.markdown("</div>", unsafe_allow_html=True)
+    with st.form(f"{task}_form"):
+        cols = st.columns(2)
+        values = []
+        for i, feature in enumerate(cfg["features"]):
+            with cols[i % 2]:
+                if "options" in feature:
+                    option = st.selectbox(feature["label"], list(feature["options"]))
+                    values.append(feature["options"][option])
+                else:
+                    values.append(st.number_input(
+                        feature["label"], min_value=0.0, value=feature["value"], step=feature["step"]
+                    ))
+
+        # ========== 预测按钮 ==========
+        predict_button = st.form_submit_button(f"🔮 Predict {cfg['target']}")
 
     # ========== 执行预测 ==========
     if predict_button:
         try:
-            feature_names = ["W/C", "A/C", "Dmin", "ASR", "Porosity", "Shape", "Diameter", "Height"]
-            
-            # 构造输入
-            input_data = np.array([[W_C, A_C, Dmin, ASR, Porosity, Shape, Diameter, Height]])
-            input_scaled = scaler.transform(input_data)
-            input_scaled_df = pd.DataFrame(input_scaled, columns=feature_names)
-
-            # 预测
-            prediction = model.predict(input_scaled)[0]
+            prediction, force_plot_html = compute_shap_and_plot(task, tuple(values))
 
             # 显示预测结果
             st.markdown(f"""
             <div class='result-box'>
-                <div class='result-value'>Predicted Compressive Strength: {prediction:.2f} MPa</div>
+                <div class='result-value'>Predicted {cfg['target']}: {prediction:.2f} {cfg['unit']}</div>
             </div>
             """, unsafe_allow_html=True)
 
             # ========== SHAP Force Plot ==========
             st.markdown("### 🔹 SHAP Force Plot (Feature Contributions)")
-
-            explainer = shap.Explainer(model)
-            full_explanation = explainer(input_scaled_df)
-
-            plot_explanation = shap.Explanation(
-                values=full_explanation.values[0],
-                base_values=full_explanation.base_values[0],
-                data=None,
-                feature_names=full_explanation.feature_names
+            components.html(
+                f"<head>{get_shap_js()}</head><body>{force_plot_html}</body>", height=160
             )
 
-            force_plot_fig = shap.plots.force(
-                plot_explanation,
-                matplotlib=True,
-                show=False,
-                contribution_threshold=0
-            )
-
-            st.pyplot(force_plot_fig, bbox_inches='tight')
-            plt.close(force_plot_fig)
-
         except Exception as e:
             st.error(f"❌ An error occurred during prediction or SHAP computation: {e}")
 
+
+# ========== 任务选择 ==========
+task = st.sidebar.radio("Task", list(CONFIG)) if len(CONFIG) > 1 else next(iter(CONFIG))
+render(task)
+
 # ========== 底部信息 ==========
-st.markdown("<hr>", unsafe_allow_html=True)
-st.markdown("<p style='text-align:center; font-size:14px; color:gray;'>Developed by Q.D. | Powered by Streamlit & CatBoost | SHAP Interpretation Enabled</p>", unsafe_allow_html=True)
+footer_html = (
+    "<hr>"
+    "<p style='text-align:center; font-size:14px; color:gray;'>Developed by Q.D. | "
+    f"Powered by Streamlit & {CONFIG[task]['backend']} | SHAP Interpretation Enabled</p>"
+)
+st.markdown(footer_html, unsafe_allow_html=True)